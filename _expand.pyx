@@ -0,0 +1,123 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Optional compiled kernel for wordlist-expander.py
+
+Build it in place with ``cythonize -i _expand.pyx``. When the module is
+missing, the script uses its pure-Python path instead.
+"""
+
+from cpython.exc cimport PyErr_SetFromErrno
+from libc.errno cimport errno, EINTR
+from libc.stdlib cimport malloc, free
+from libc.string cimport memcpy
+from posix.unistd cimport write
+
+cdef enum:
+    BUFFER_SIZE = 1 << 16  # Bytes collected before each write(2)
+
+cdef int write_all(int fd, const char *data, Py_ssize_t length) except -1:
+    """Write the whole buffer, retrying short and interrupted writes"""
+    cdef Py_ssize_t written
+    while length > 0:
+        written = write(fd, data, length)
+        if written < 0:
+            if errno == EINTR:
+                continue
+            PyErr_SetFromErrno(OSError)
+            return -1
+        data += written
+        length -= written
+    return 0
+
+def emit_product(parts, int fd):
+    """Write every combination of the parts, one per line, to a file descriptor
+
+    Each part is a sequence of bytes alternatives, as produced by expand_part.
+    Combinations are written in itertools.product order.
+    """
+    cdef list alternatives = [tuple(part) for part in parts]
+    cdef Py_ssize_t count = len(alternatives)
+    cdef Py_ssize_t total = 0
+    cdef Py_ssize_t line_size = 1
+    cdef Py_ssize_t longest
+    cdef bytes item
+    for part in alternatives:
+        if not part:
+            return
+        longest = 0
+        for item in part:
+            longest = max(longest, len(item))
+        total += len(part)
+        line_size += longest
+
+    cdef Py_ssize_t capacity = max(BUFFER_SIZE, line_size)
+    # Alternatives of all parts laid out back to back; part i owns
+    # items[first[i]:first[i + 1]]
+    cdef const char **items = <const char **>malloc((total + 1) * sizeof(char *))
+    cdef Py_ssize_t *sizes = <Py_ssize_t *>malloc((total + 1) * sizeof(Py_ssize_t))
+    cdef Py_ssize_t *first = <Py_ssize_t *>malloc((count + 1) * sizeof(Py_ssize_t))
+    # Odometer: the selected alternative of each part, and where each part
+    # ends in the current line
+    cdef Py_ssize_t *index = <Py_ssize_t *>malloc((count + 1) * sizeof(Py_ssize_t))
+    cdef Py_ssize_t *ends = <Py_ssize_t *>malloc((count + 1) * sizeof(Py_ssize_t))
+    cdef char *line = <char *>malloc(line_size)
+    cdef char *out = <char *>malloc(capacity)
+    cdef Py_ssize_t i, j, k, length
+    cdef Py_ssize_t fill = 0
+
+    try:
+        if (items == NULL or sizes == NULL or first == NULL or index == NULL
+                or ends == NULL or line == NULL or out == NULL):
+            raise MemoryError()
+
+        k = 0
+        for i in range(count):
+            first[i] = k
+            for item in alternatives[i]:
+                items[k] = item
+                sizes[k] = len(item)
+                k += 1
+        first[count] = k
+
+        # Start from the first alternative of every part
+        ends[0] = 0
+        for i in range(count):
+            index[i] = first[i]
+            memcpy(line + ends[i], items[first[i]], sizes[first[i]])
+            ends[i + 1] = ends[i] + sizes[first[i]]
+
+        while True:
+            length = ends[count]
+            if fill + length + 1 > capacity:
+                write_all(fd, out, fill)
+                fill = 0
+            memcpy(out + fill, line, length)
+            fill += length
+            out[fill] = ord('\n')
+            fill += 1
+
+            # Advance the last part first, carrying into earlier parts
+            i = count - 1
+            while i >= 0:
+                index[i] += 1
+                if index[i] < first[i + 1]:
+                    break
+                index[i] = first[i]
+                i -= 1
+            if i < 0:
+                break
+
+            # Only the parts from the one that changed onwards need rewriting
+            for j in range(i, count):
+                k = index[j]
+                memcpy(line + ends[j], items[k], sizes[k])
+                ends[j + 1] = ends[j] + sizes[k]
+
+        write_all(fd, out, fill)
+    finally:
+        free(items)
+        free(sizes)
+        free(first)
+        free(index)
+        free(ends)
+        free(line)
+        free(out)
@@ -3,185 +3,365 @@
 import sys
 import re
 import itertools
+from operator import methodcaller
+import functools
+import collections
+import math
 import string
 import argparse
 
+try:
+    # Optional compiled kernel, built from _expand.pyx
+    from _expand import emit_product
+except ImportError:
+    emit_product = None
+
 intlimit = 1000000  # Limit for the number of combinations to generate
+materialize_limit = 1 << 20  # Largest quantifier expansion (in bytes) kept in memory
+tail_cache_limit = 1 << 16  # Most combinations of the parts after a lazy quantifier that are cached
+output_batch_size = 8192  # Number of results written to stdout at once
+output_block_lines = 4096  # Most lines sharing a prefix that are joined into one block
+dedup_exact_limit = 1 << 22  # Results tracked exactly before --approximate-dedup switches to a Bloom filter
+dedup_max_capacity = 1 << 25  # Most results the Bloom filter is sized for (about 80 MB); past it the error rate grows
+dedup_error_rate = 1e-4  # Chance that a new result is mistaken for a duplicate once the Bloom filter is in use
+
+# A quantified part: every string of min_count to max_count characters from chars
+Quantifier = collections.namedtuple('Quantifier', ['chars', 'min_count', 'max_count'])
+
+# A wordlist pattern parsed once: its parts, with a None slot for each \x
+WordlistPlan = collections.namedtuple('WordlistPlan', ['template', 'slot_indices', 'slots'])
+
+# Shorthand quantifiers and their {m,n} form; they only count when preceded
+# by a character that isn't a backslash
+_SHORTHAND_QUANTIFIERS = {'+': f"{{1,{intlimit}}}", '*': f"{{0,{intlimit}}}", '?': "{0,1}"}
+_SHORTHAND_QUANTIFIER_RE = re.compile(r'(?<=[^\\])[+*?]')
+
+# Tokenizer states
+_NORMAL, _IN_CLASS, _IN_QUANT = range(3)
+
+# Stands in for \x while a wordlist pattern is parsed; command-line
+# arguments cannot contain NUL, so it never collides with the pattern
+_WORD_SLOT = '\0'
+
+def encode_text(text):
+    """Encode pattern or wordlist text into the bytes written to stdout"""
+    return text.encode('utf-8', 'surrogateescape')
+
+def encode_chars(chars):
+    """Encode each character on its own, keeping them as separate alternatives"""
+    return tuple(encode_text(char) for char in chars)
 
 def expand_char_range(start, end):
     """Expand character ranges like A-Z, a-z, A-z"""
-    return [chr(i) for i in range(ord(start), ord(end) + 1)]
+    return encode_chars(chr(i) for i in range(ord(start), ord(end) + 1))
+
+# Base character sets
+_DIGITS = list(string.digits)
+_WORD_CHARS = list(string.ascii_letters + string.digits + '_')
+_WHITESPACE = list(' \t\n\r\f\v')
+
+# All printable characters, used to build the complement sets
+_ALL_CHARS = list(string.printable)
+
+_NON_DIGITS = sorted(set(_ALL_CHARS) - set(_DIGITS))
+_NON_WORD = sorted(set(_ALL_CHARS) - set(_WORD_CHARS))
+_NON_WHITESPACE = sorted(set(_ALL_CHARS) - set(_WHITESPACE))
+
+# Special escape sequences
+_ESCAPE_SEQUENCES = {
+    'n': '\n',  # newline
+    't': '\t',  # tab
+    'r': '\r',  # carriage return
+    'f': '\f',  # form feed
+    'v': '\v',  # vertical tab
+    'b': '\b',  # backspace
+    'a': '\a',  # bell/alert
+    '\\': '\\',  # double backslash outputs a single backslash
+}
+
+_CHAR_CLASS_MAP = {
+    'w': encode_chars(_WORD_CHARS),       # Word characters [A-Za-z0-9_]
+    'd': encode_chars(_DIGITS),           # Digits [0-9]
+    's': encode_chars(_WHITESPACE),       # Whitespace [ \t\n\r\f\v]
+    'W': encode_chars(_NON_WORD),         # Non-word characters [^A-Za-z0-9_]
+    'D': encode_chars(_NON_DIGITS),       # Non-digits [^0-9]
+    'S': encode_chars(_NON_WHITESPACE),   # Non-whitespace [^ \t\n\r\f\v]
+}
 
 def get_char_class(pattern, i):
     """Handle special regex character classes"""
     if i + 1 >= len(pattern):
-        return [pattern[i]], 1
-    
+        return (encode_text(pattern[i]),), 1
     if pattern[i] != '\\':
         return None, 0
 
-    # Define base character sets
-    digits = list(string.digits)
-    word_chars = list(string.ascii_letters + string.digits + '_')
-    whitespace = list(' \t\n\r\f\v')
-    
-    # Define all printable characters for complement sets
-    all_chars = list(string.printable)
-    
-    # Create complement sets
-    non_digits = sorted(list(set(all_chars) - set(digits)))
-    non_word = sorted(list(set(all_chars) - set(word_chars)))
-    non_whitespace = sorted(list(set(all_chars) - set(whitespace)))
-
-    # Special escape sequences
-    escape_sequences = {
-        'n': '\n',  # newline
-        't': '\t',  # tab
-        'r': '\r',  # carriage return
-        'f': '\f',  # form feed
-        'v': '\v',  # vertical tab
-        'b': '\b',  # backspace
-        'a': '\a',  # bell/alert
-    }
-
-    char_class_map = {
-        'w': word_chars,        # Word characters [A-Za-z0-9_]
-        'd': digits,            # Digits [0-9]
-        's': whitespace,        # Whitespace [ \t\n\r\f\v]
-        'W': non_word,          # Non-word characters [^A-Za-z0-9_]
-        'D': non_digits,        # Non-digits [^0-9]
-        'S': non_whitespace,    # Non-whitespace [^ \t\n\r\f\v]
-    }
-
     next_char = pattern[i + 1]
-    if next_char in char_class_map:
-        return char_class_map[next_char], 2
-    if next_char == '\\':
-        # Double backslash should output a single backslash
-        return ['\\'], 2
-    if next_char in escape_sequences:
-        # Handle special escape sequences
-        return [escape_sequences[next_char]], 2
-    # For any other escaped character, just return the character itself
-    return [next_char], 2
+    if next_char in _CHAR_CLASS_MAP:
+        return _CHAR_CLASS_MAP[next_char], 2
+    # Escape sequences map to their control character; any other escaped
+    # character is returned as itself
+    return (encode_text(_ESCAPE_SEQUENCES.get(next_char, next_char)),), 2
 
-def generate_combinations_parts(pattern):
-    """Generate the parts list for pattern combination"""
-    # First, process regex quantifiers that aren't escaped
-    processed_pattern = ""
-    i = 0
-    while i < len(pattern):
-        if i > 0 and pattern[i-1] != '\\':  # Check if not escaped
-            if pattern[i] == '+':
-                processed_pattern += f"{{1,{intlimit}}}"
-                i += 1
-                continue
-            elif pattern[i] == '*':
-                processed_pattern += f"{{0,{intlimit}}}"
-                i += 1
-                continue
-            elif pattern[i] == '?':
-                processed_pattern += "{0,1}"
-                i += 1
+@functools.lru_cache(maxsize=None)
+def parse_bracket(contents):
+    """Parse the contents of a [...] character class into its sorted characters"""
+    chars = set()  # Use set to avoid duplicates
+    j = 0
+    end = len(contents)
+    while j < end:
+        if j + 1 < end and contents[j] == '\\':
+            # Handle special character classes inside brackets
+            char_class, advance = get_char_class(contents, j)
+            if char_class is not None:
+                chars.update(char_class)
+                j += advance
                 continue
-        processed_pattern += pattern[i]
-        i += 1
-    
-    pattern = processed_pattern
-    parts = []
+        if j + 2 < end and contents[j+1] == '-':
+            # Handle ranges like A-Z, a-z, A-z
+            chars.update(expand_char_range(contents[j], contents[j+2]))
+            j += 3
+        else:
+            chars.add(encode_text(contents[j]))
+            j += 1
+    return tuple(sorted(chars))
+
+def validate_pattern(pattern):
+    """Check in a single pass that brackets, braces, groups and quantifiers are well formed
+
+    A \\x placeholder may sit inside a [...] class, since the wordlist path
+    writes the word in and parses the class again, but not inside a {...}
+    quantifier, whose counts must be digits.
+    """
+    depth = 0
+    repeatable = False  # Whether the previous item can take a quantifier
     i = 0
     while i < len(pattern):
-        # Check for special character classes first
-        char_class, advance = get_char_class(pattern, i)
-        if char_class is not None:
-            parts.append(char_class)
-            i += advance
-        elif pattern[i] == '[':            # Handle character class
-            end = pattern.index(']', i)
-            chars = set()  # Use set to avoid duplicates
-            j = i + 1
-            while j < end:
-                if j + 1 < end and pattern[j] == '\\':
-                    # Handle special character classes inside brackets
-                    char_class, advance = get_char_class(pattern, j)
-                    if char_class is not None:
-                        chars.update(char_class)
-                        j += advance
-                        continue
-                if j + 2 < end and pattern[j+1] == '-':
-                    # Handle ranges like A-Z, a-z, A-z
-                    chars.update(expand_char_range(pattern[j], pattern[j+2]))
+        char = pattern[i]
+        if char == '\\':
+            if i + 1 >= len(pattern):
+                return False
+            i += 2
+            repeatable = True
+            continue
+        if char == '[':
+            end = pattern.find(']', i + 1)
+            if end <= i + 1:  # Unterminated or empty class
+                return False
+            # Ranges are read the same way parse_bracket reads them
+            contents = pattern[i+1:end]
+            j = 0
+            while j < len(contents):
+                if j + 1 < len(contents) and contents[j] == '\\':
+                    j += 2
+                elif j + 2 < len(contents) and contents[j+1] == '-':
+                    if ord(contents[j]) > ord(contents[j+2]):  # Reversed range
+                        return False
                     j += 3
                 else:
-                    chars.add(pattern[j])
                     j += 1
-            parts.append(sorted(list(chars)))
             i = end + 1
-        elif pattern[i] == '{':
-            # Handle quantifier
-            end = pattern.index('}', i)
+            repeatable = True
+            continue
+        if char == '{':
+            end = pattern.find('}', i + 1)
             nums = pattern[i+1:end].split(',')
+            if end < 0 or not repeatable or len(nums) > 2:
+                return False
+            # Counts are plain digits, which also rules out a \x placeholder
+            if not all(num.isascii() and num.isdigit() for num in nums):
+                return False
+            if int(nums[0]) > int(nums[-1]):
+                return False
+            i = end + 1
+            repeatable = False
+            continue
+        if char in '+*?':
+            if not repeatable:
+                return False
+            repeatable = False
+        elif char == '(':
+            depth += 1
+            repeatable = False
+        elif char == ')':
+            if depth == 0:
+                return False
+            depth -= 1
+            repeatable = True
+        else:
+            repeatable = char not in '|^$'
+        i += 1
+    return depth == 0
+
+def tokenize(pattern):
+    """Split a pattern into class, quantifier and literal tokens in a single pass"""
+    state = _NORMAL
+    start = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if state == _NORMAL:
+            # Check for special character classes first
+            char_class, advance = get_char_class(pattern, i)
+            if char_class is not None:
+                yield ('class', char_class)
+                i += advance
+                continue
+            if char == '[':
+                state, start = _IN_CLASS, i + 1
+            elif char == '{':
+                state, start = _IN_QUANT, i + 1
+            else:
+                yield ('lit', char)
+        elif state == _IN_CLASS:
+            if char == ']':
+                yield ('class', parse_bracket(pattern[start:i]))
+                state = _NORMAL
+        elif char == '}':
+            nums = pattern[start:i].split(',')
             min_count = int(nums[0])
-            max_count = int(nums[1]) if len(nums) > 1 else min_count            # Store quantifier info with the part instead of pre-expanding
+            max_count = int(nums[1]) if len(nums) > 1 else min_count
+            yield ('quant', min_count, max_count)
+            state = _NORMAL
+        i += 1
+
+    if state == _IN_CLASS:
+        raise ValueError(f"Unterminated character class: {pattern[start - 1:]}")
+    if state == _IN_QUANT:
+        raise ValueError(f"Unterminated quantifier: {pattern[start - 1:]}")
+
+def generate_combinations_parts(pattern):
+    """Generate the parts list for pattern combination"""
+    # First, process regex quantifiers that aren't escaped
+    processed_pattern = _SHORTHAND_QUANTIFIER_RE.sub(
+        lambda match: _SHORTHAND_QUANTIFIERS[match.group()], pattern)
+
+    parts = []
+    for token in tokenize(processed_pattern):
+        if token[0] == 'quant':
+            # Store quantifier info with the part instead of pre-expanding
+            _, min_count, max_count = token
             prev_part = parts.pop()
-            parts.append((prev_part, min_count, max_count))
-            i = end + 1
+            parts.append(Quantifier(prev_part, min_count, max_count))
+        elif token[0] == 'class':
+            parts.append(token[1])
         else:
             # Handle literal character
-            parts.append([pattern[i]])
-            i += 1
+            parts.append((encode_text(token[1]),))
     return parts
 
-def generate_combinations(pattern):
-    """Generate combinations one at a time using yield"""
-    parts = generate_combinations_parts(pattern)
-    
-    def expand_part(part):
-        """Helper function to handle both simple parts and quantifier tuples"""
-        if isinstance(part, tuple):
+class _QuantifierExpansion:
+    """Re-iterable expansion of a quantifier part, generated one string at a time"""
+
+    def __init__(self, chars, min_count, max_count):
+        self.chars = chars
+        self.min_count = min_count
+        self.max_count = max_count
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(
+            map(b''.join, itertools.product(self.chars, repeat=n))
+            for n in range(self.min_count, self.max_count + 1))
+
+def expansion_size(chars, min_count, max_count):
+    """Count the bytes a fully expanded quantifier would hold, up to the materialize limit"""
+    if not chars:
+        return 0
+    # Alternatives can be longer than one byte (multi-byte characters, or a
+    # whole word for a quantified \x), so weight each length by the longest
+    width = max(map(len, chars))
+    size = 0
+    for n in range(min_count, max_count + 1):
+        size += len(chars) ** n * max(width * n, 1)
+        if size > materialize_limit:
+            break
+    return size
+
+def expand_part(part):
+    """Turn a parsed part into an iterable of the strings it can produce"""
+    if isinstance(part, Quantifier):
+        # itertools.product keeps a copy of every input, so only small
+        # expansions are materialized; huge ones stay lazy
+        if expansion_size(*part) <= materialize_limit:
+            return tuple(_QuantifierExpansion(*part))
+        return _QuantifierExpansion(*part)
+    return part
+
+def combine_parts(parts):
+    """Return an iterator over the concatenation of every combination of the expanded parts"""
+    lazy = [i for i, part in enumerate(parts) if isinstance(part, _QuantifierExpansion)]
+    if not lazy:
+        # map keeps the per-combination join in C
+        return map(b''.join, itertools.product(*parts))
+
+    # Everything after the last lazy part goes through itertools.product;
+    # the lazy part itself is streamed and re-iterated for each prefix
+    split = lazy[-1]
+    tail = parts[split + 1:]
+
+    heads = itertools.chain.from_iterable(
+        map(prefix.__add__, parts[split]) for prefix in combine_parts(parts[:split]))
+    if not tail:
+        return heads
+    if math.prod(map(len, tail)) <= tail_cache_limit:
+        # Combine a small tail once instead of rerunning product for every head
+        suffixes = list(combine_parts(tail))
+        return itertools.chain.from_iterable(map(head.__add__, suffixes) for head in heads)
+    return itertools.chain.from_iterable(
+        map(head.__add__, map(b''.join, itertools.product(*tail))) for head in heads)
+
+def output_blocks(parts):
+    """Return an iterator over newline-terminated blocks of output for the expanded parts
+
+    The last part must be materialized. Trailing parts are combined once into
+    suffix lines, up to output_block_lines of them, and every combination of
+    the leading parts is then written in front of each suffix by a single
+    bytes.join.
+    """
+    split = len(parts) - 1
+    lines = len(parts[split])
+    while (split > 0 and not isinstance(parts[split - 1], _QuantifierExpansion)
+           and lines * len(parts[split - 1]) <= output_block_lines):
+        split -= 1
+        lines *= len(parts[split])
+
+    # The leading empty entry makes prefix.join() start with the prefix too
+    suffixes = [b''] + [line + b'\n' for line in combine_parts(parts[split:])]
+    return map(methodcaller('join', suffixes), combine_parts(parts[:split]))
+
+def can_produce_duplicates(parts):
+    """Check whether two different combinations of the parts can build the same string
+
+    Every part offers distinct alternatives, so the output is unique unless
+    more than one part can vary in length and shift the boundaries between parts.
+    """
+    variable_width = 0
+    for part in parts:
+        if isinstance(part, Quantifier):
             chars, min_count, max_count = part
-            # Generate one length at a time to avoid memory explosion
-            for n in range(min_count, max_count + 1):
-                for p in itertools.product(chars, repeat=n):
-                    yield ''.join(p)
-        else:
-            for char in part:
-                yield char
-    
-    # Generate one complete combination at a time
-    def recursive_combine(prefix, remaining_parts):
-        if not remaining_parts:
-            yield prefix
-            return
-            
-        current_part = remaining_parts[0]
-        for expanded in expand_part(current_part):
-            yield from recursive_combine(prefix + expanded, remaining_parts[1:])
-    
-    yield from recursive_combine("", parts)
+            if isinstance(chars, Quantifier):
+                # Nested quantifier, not worth reasoning about
+                return True
+            if min_count != max_count:
+                variable_width += 1
+    return variable_width > 1
+
+def generate_combinations(pattern):
+    """Return an iterator that generates combinations one at a time"""
+    parts = [expand_part(part) for part in generate_combinations_parts(pattern)]
+    return combine_parts(parts)
 
 def get_capitalization_variants(line):
-    """Generate capitalization variants for a line of text"""
-    words = line.split()
-    variants = set()  # Use set to automatically handle duplicates
-    
-    # 1. Original string
-    variants.add(line)
-    
-    # 2. All lowercase
-    variants.add(line.lower())
-    
-    # 3. First letter capitalized (e.g., "test string" -> "Test string")
-    variants.add(line.capitalize())
-    
-    # 4. First letter of each word capitalized (e.g., "test string" -> "Test String")
-    variants.add(' '.join(word.capitalize() for word in words))
-    
-    # 5. All capital letters
-    variants.add(line.upper())
-    
-    # Convert back to list and sort for consistent output order
-    return sorted(variants)
+    """Generate capitalization variants for a line of text, in a fixed order
+
+    Variants can repeat (e.g. for an all-lowercase line); callers drop them.
+    """
+    return (
+        line,                # Original string
+        line.lower(),        # All lowercase
+        line.capitalize(),   # "test string" -> "Test string"
+        ' '.join(word.capitalize() for word in line.split()),  # "test string" -> "Test String"
+        line.upper(),        # All capital letters
+    )
 
 def load_wordlist(wordlist_path, capitalize=False):
     """Load words from a wordlist file, with optional capitalization variants"""
@@ -189,42 +369,210 @@ def load_wordlist(wordlist_path, capitalize=False):
         with open(wordlist_path, 'r') as f:
             lines = [line.strip() for line in f if line.strip()]
             if capitalize:
-                # For each line, generate its capitalization variants
-                expanded_lines = []
-                for line in lines:
-                    expanded_lines.extend(get_capitalization_variants(line))
-                return expanded_lines
+                # For each line, generate its capitalization variants; dict
+                # keys drop repeats while keeping the first-seen order
+                variants = map(get_capitalization_variants, lines)
+                return list(dict.fromkeys(itertools.chain.from_iterable(variants)))
             return lines
     except Exception as e:
         print(f"Error reading wordlist file: {e}", file=sys.stderr)
         sys.exit(1)
 
-def process_pattern_with_wordlist(pattern, wordlist):
-    """Process a pattern containing \\x placeholders using words from the wordlist"""
-    if '\\x' not in pattern:
+@functools.lru_cache(maxsize=None)
+def split_last_char(word):
+    """Split an encoded word into everything before its last character, and that character"""
+    text = word.decode('utf-8', 'surrogateescape')
+    return encode_text(text[:-1]), encode_text(text[-1:])
+
+def fill_word_slot(slot, word):
+    """Return the parts a parsed \\x placeholder, plain or quantified, stands for with the given word"""
+    if isinstance(slot, Quantifier):
+        # As if the word were written into the pattern, the quantifier only
+        # repeats its last character
+        head, last = split_last_char(word)
+        return [(head,), expand_part(slot._replace(chars=(last,)))]
+    return [(word,)]
+
+def split_wordlist_pattern(pattern):
+    """Split a pattern on its \\x placeholders into the text between them"""
+    # Split pattern by \x, but handle escaped backslashes: hide them behind
+    # NUL (which command-line arguments cannot contain) so str.split skips them
+    segments = [segment.replace('\0', '\\\\')
+                for segment in pattern.replace('\\\\', '\0').split('\\x')]
+    if len(segments) < 2:
         print("Error: When using --wordlist, the pattern must contain at least one \\x", file=sys.stderr)
         sys.exit(1)
+    return segments
 
-    # Split pattern by \x, but handle escaped backslashes
-    parts = []
-    current = ""
-    i = 0
-    while i < len(pattern):
-        if i + 1 < len(pattern) and pattern[i:i+2] == '\\x':
-            parts.append(current)
-            current = ""
-            i += 2
-        else:
-            current += pattern[i]
+def slot_in_brackets(segments):
+    """Check whether a [...] class or {...} quantifier is still open where a \\x splits the pattern"""
+    closing = None  # The character that ends the class or quantifier being read
+    for segment in segments[:-1]:
+        i = 0
+        while i < len(segment):
+            char = segment[i]
+            if closing is None:
+                if char == '\\':
+                    i += 1
+                elif char == '[':
+                    closing = ']'
+                elif char == '{':
+                    closing = '}'
+            elif char == closing:
+                closing = None
             i += 1
-    parts.append(current)
-    
-    # Generate combinations one at a time
-    for word_combo in itertools.product(wordlist, repeat=len(parts)-1):
-        current_pattern = parts[0]
-        for i, word in enumerate(word_combo):
-            current_pattern += word + parts[i+1]
-        yield from generate_combinations(current_pattern)
+        if closing is not None:
+            return True
+    return False
+
+def compile_wordlist_pattern(pattern):
+    """Parse a pattern containing \\x placeholders into a template of parts with word slots
+
+    Returns None when a \\x sits inside a [...] class or {...} quantifier;
+    such a pattern only makes sense once the word is in place, so it has to
+    be parsed again for every combination.
+    """
+    parts = split_wordlist_pattern(pattern)
+    if slot_in_brackets(parts):
+        return None
+
+    # Parse the static segments once. Each segment after a \x is parsed
+    # behind a placeholder for the word, so a quantifier right after \x
+    # stays attached to the slot
+    segments = [[expand_part(part) for part in generate_combinations_parts(parts[0])]]
+    slots = []
+    for segment in parts[1:]:
+        slot, *rest = generate_combinations_parts(_WORD_SLOT + segment)
+        slots.append(slot)
+        segments.append([expand_part(part) for part in rest])
+
+    # Lay the segments out in one flat list, remembering where each word
+    # goes; a quantified slot takes two places, for the head of the word
+    # and its repeated last character
+    template = list(segments[0])
+    slot_indices = []
+    for slot, segment in zip(slots, segments[1:]):
+        slot_indices.append(len(template))
+        template.extend([None] * (2 if isinstance(slot, Quantifier) else 1))
+        template.extend(segment)
+    return WordlistPlan(template, slot_indices, slots)
+
+def splice_words(plan, word_combos):
+    """Return an iterator over the output of the plan for each word combination"""
+    # Generate combinations one at a time, splicing the words in as literals
+    def spliced_parts():
+        for word_combo in word_combos:
+            combined = plan.template[:]
+            for index, slot, word in zip(plan.slot_indices, plan.slots, word_combo):
+                filled = fill_word_slot(slot, word)
+                combined[index:index + len(filled)] = filled
+            yield combined
+
+    return itertools.chain.from_iterable(map(combine_parts, spliced_parts()))
+
+def reparse_words(segments, word_combos):
+    """Return an iterator over the output of the pattern with each word combination written into its text"""
+    def patterns():
+        for word_combo in word_combos:
+            current_pattern = segments[0]
+            for word, segment in zip(word_combo, segments[1:]):
+                current_pattern += word.decode('utf-8', 'surrogateescape') + segment
+            yield current_pattern
+
+    return itertools.chain.from_iterable(map(generate_combinations, patterns()))
+
+def process_pattern_with_wordlist(pattern, wordlist, plan):
+    """Process a pattern containing \\x placeholders using words from the wordlist
+
+    plan is the pattern as returned by compile_wordlist_pattern.
+    """
+    if plan is None:
+        segments = split_wordlist_pattern(pattern)
+        return reparse_words(segments, itertools.product(wordlist, repeat=len(segments) - 1))
+    return splice_words(plan, itertools.product(wordlist, repeat=len(plan.slots)))
+
+class BloomFilter:
+    """Fixed-size Bloom filter over bytes, using double hashing of the built-in hash"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item):
+        """Add an item, returning True if it was probably added before"""
+        # hash() runs in C and bytes cache it, so the second hash only mixes
+        # the first one again
+        h1 = hash(item)
+        h2 = hash((h1, self.size)) | 1
+        bits = self.bits
+        present = True
+        for k in range(self.hash_count):
+            position = (h1 + k * h2) % self.size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                present = False
+        return present
+
+def count_combinations(parts):
+    """Count the combinations the parsed parts produce, duplicates included, capped at dedup_max_capacity"""
+    total = 1
+    for part in parts:
+        if isinstance(part, (Quantifier, _QuantifierExpansion)):
+            chars, min_count, max_count = part.chars, part.min_count, part.max_count
+            if not chars:
+                count = int(min_count == 0)
+            elif len(chars) == 1:
+                count = max(0, max_count - min_count + 1)
+            else:
+                count = 0
+                for n in range(min_count, max_count + 1):
+                    count += len(chars) ** n
+                    if count > dedup_max_capacity:
+                        break
+        else:
+            count = len(part)
+        total = min(total * count, dedup_max_capacity)
+    return total
+
+def count_wordlist_combinations(plan, wordlist):
+    """Count the combinations a wordlist plan produces, capped like count_combinations"""
+    parts = [part for part in plan.template if part is not None]
+    for slot in plan.slots:
+        parts.append(wordlist)
+        if isinstance(slot, Quantifier):
+            # A quantified slot repeats its one word, once per count
+            parts.append(slot._replace(chars=wordlist[:1]))
+    return count_combinations(parts)
+
+def unique_results(generator, bloom_capacity=None):
+    """Drop results that were already yielded, keeping the original order
+
+    Results are tracked in an exact set. If bloom_capacity is given, the set
+    is only used until it holds dedup_exact_limit results; after that a
+    Bloom filter sized for bloom_capacity takes over, which bounds memory at
+    the cost of dropping roughly dedup_error_rate of the remaining unique
+    results.
+    """
+    seen = set()
+    for result in generator:
+        if result not in seen:
+            seen.add(result)
+            yield result
+            if bloom_capacity is not None and len(seen) >= dedup_exact_limit:
+                break
+    else:
+        return
+
+    capacity = min(max(bloom_capacity, 2 * dedup_exact_limit), dedup_max_capacity)
+    bloom = BloomFilter(capacity, dedup_error_rate)
+    for result in seen:
+        bloom.add(result)
+    seen = None
+    for result in generator:
+        if not bloom.add(result):
+            yield result
 
 def main():
     parser = argparse.ArgumentParser(description='Generate all possible strings matching a regex pattern')
@@ -232,33 +580,71 @@ def main():
     parser.add_argument('--wordlist', help='Path to a wordlist file for \\x substitution')
     parser.add_argument('-c', '--capitalize', action='store_true', 
                        help='Generate capitalization variants for each wordlist line (only works with --wordlist)')
+    parser.add_argument('--approximate-dedup', action='store_true',
+                       help='Bound deduplication memory with a Bloom filter after the first few million unique '
+                            'results; about one in ten thousand new results may then be skipped')
     args = parser.parse_args()
 
     try:
+        if not validate_pattern(args.pattern):
+            print(f"Error: Invalid regex pattern: {args.pattern}", file=sys.stderr)
+            sys.exit(1)
+
         # Process the pattern and stream results
         if args.wordlist:
             if args.capitalize and '\\x' not in args.pattern:
                 print("Error: -c/--capitalize option requires \\x in the pattern", file=sys.stderr)
                 sys.exit(1)
             wordlist = load_wordlist(args.wordlist, args.capitalize)
-            # Escape \x in pattern before regex validation
-            validation_pattern = args.pattern.replace('\\x', 'X')  # temporary replacement for validation
-            re.compile(validation_pattern)  # validate the pattern
-            generator = process_pattern_with_wordlist(args.pattern, wordlist)
+            wordlist = [encode_text(word) for word in wordlist]
+            plan = compile_wordlist_pattern(args.pattern)
+            generator = process_pattern_with_wordlist(args.pattern, wordlist, plan)
+            # Words can collide once concatenated, so always deduplicate
+            bloom_capacity = None
+            if args.approximate_dedup:
+                if plan is not None:
+                    bloom_capacity = count_wordlist_combinations(plan, wordlist)
+                else:
+                    bloom_capacity = dedup_max_capacity
+            generator = unique_results(generator, bloom_capacity)
+        elif not any(char in args.pattern for char in '[\\{+*?'):
+            # A pattern without classes, escapes or quantifiers only matches itself
+            sys.stdout.buffer.write(encode_text(args.pattern) + b'\n')
+            sys.stdout.buffer.flush()
+            return
         else:
-            re.compile(args.pattern)  # validate the pattern
-            generator = generate_combinations(args.pattern)
-
-        # Print results as they are generated
-        seen = set()  # To maintain uniqueness while streaming
-        for result in generator:
-            if result not in seen:  # Only print unique results
-                seen.add(result)
-                print(result, flush=True)  # flush=True ensures immediate output
-
-    except re.error:
-        print(f"Error: Invalid regex pattern: {args.pattern}", file=sys.stderr)
-        sys.exit(1)
+            parts = generate_combinations_parts(args.pattern)
+            expanded = [expand_part(part) for part in parts]
+            if can_produce_duplicates(parts):
+                bloom_capacity = count_combinations(parts) if args.approximate_dedup else None
+                generator = unique_results(combine_parts(expanded), bloom_capacity)
+            elif emit_product is not None and not any(
+                    isinstance(part, _QuantifierExpansion) for part in expanded):
+                # The compiled kernel writes straight to the file descriptor
+                sys.stdout.flush()
+                emit_product(expanded, sys.stdout.fileno())
+                return
+            elif expanded and not isinstance(expanded[-1], _QuantifierExpansion):
+                # Without the kernel, still build output a block at a time
+                out = sys.stdout.buffer
+                for block in output_blocks(expanded):
+                    out.write(block)
+                out.flush()
+                return
+            else:
+                generator = combine_parts(expanded)
+
+        # Print results in batches so output isn't one write per line; the
+        # results are already encoded, so they bypass the text layer
+        out = sys.stdout.buffer
+        while True:
+            batch = list(itertools.islice(generator, output_batch_size))
+            if not batch:
+                break
+            out.write(b'\n'.join(batch))
+            out.write(b'\n')
+            out.flush()  # keep long-running patterns streaming
+
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)